@@ -1,438 +1,574 @@
+import dataclasses
+import functools
+import gzip
 import json
 import os
+import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import parse_qs
 import requests
 from Bio import PDB
-import plotly.graph_objects as go
-import plotly.utils
 import numpy as np
+import orjson
 
 # Add the parent directory to the path to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Netlify keeps /tmp (and this module) alive across warm invocations, so
+# fetched PDB files and the HTTP connection pool are reused between requests
+_PDB_CACHE_DIR = '/tmp/pdbcache'
+_SESSION = requests.Session()
+_SESSION.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=8, pool_maxsize=16))
+
+# Parser construction is not free either; one instance serves every
+# invocation of this container
+_PARSER = PDB.PDBParser(QUIET=True)
+
+# Batch requests fan out over threads (requests releases the GIL on
+# socket reads); the semaphore caps concurrent connections to RCSB so we
+# stay under their rate limits
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+_FETCH_SEMAPHORE = threading.Semaphore(8)
+
+
+@functools.lru_cache(maxsize=64)
+def _fetch_pdb_cached(pdb_id):
+    """Stream the gzipped PDB file from RCSB into /tmp and return its
+    path; the compressed transfer is 4-6x smaller than plain text"""
+    cache_path = os.path.join(_PDB_CACHE_DIR, f"{pdb_id}.pdb.gz")
+    if os.path.exists(cache_path):
+        return cache_path
+
+    url = f"https://files.rcsb.org/download/{pdb_id}.pdb.gz"
+    with _FETCH_SEMAPHORE:
+        response = _SESSION.get(url, stream=True)
+        response.raise_for_status()
+
+        os.makedirs(_PDB_CACHE_DIR, exist_ok=True)
+        # Stream to a temp name and rename into place: an interrupted
+        # download must never leave a truncated file that the exists()
+        # check (and this function's lru_cache) would then serve forever
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as cached:
+            shutil.copyfileobj(response.raw, cached)
+        os.replace(tmp_path, cache_path)
+
+    return cache_path
+
+
+@functools.lru_cache(maxsize=16)
+def _parse_pdb_cached(pdb_path):
+    """Parsed structure cache, shared across warm invocations; the
+    gzipped file streams straight into the parser without ever
+    materializing the decompressed text as a Python string"""
+    with gzip.open(pdb_path, 'rt') as pdb_file:
+        return _PARSER.get_structure("protein", pdb_file)
+
+
+@dataclasses.dataclass
+class ProteinArrays:
+    """SoA arrays for one structure - everything downstream of parsing
+    reads from these instead of a BioPython object tree"""
+    coords: np.ndarray         # (N, 3) float32 atom coordinates
+    element_codes: np.ndarray  # (N,) int8, see _ELEMENT_CODE
+    res_names: np.ndarray      # (R,) residue names, amino acids only
+    res_ids: np.ndarray        # (R,) int32 residue sequence numbers
+    res_codes: np.ndarray      # (R,) int8, see _RESIDUE_CODES
+    ss_codes: np.ndarray       # (R,) int8, 0=coil 1=helix 2=sheet
+    ca_coords: np.ndarray      # (C, 3) float32 CA coordinates
+    ca_res_ids: np.ndarray     # (C,) int32
+
+
+def parse_pdb_fast(text):
+    """Parse ATOM/HETATM records straight into ProteinArrays with
+    fixed-column slicing, skipping BioPython's Structure/Residue/Atom
+    object tree.
+
+    Accepts the file text or an iterable of lines. Returns None when no
+    atom records parse cleanly (caller falls back to BioPython).
+    """
+    if isinstance(text, str):
+        text = text.splitlines()
+
+    coords = []
+    element_codes = []
+    res_names = []
+    res_ids = []
+    res_codes = []
+    ca_coords = []
+    ca_res_ids = []
+    last_res = None
+
+    try:
+        for line in text:
+            record = line[:6]
+            if record == 'ENDMDL':  # First model only
+                break
+            is_aa = record == 'ATOM  '
+            if not is_aa and record != 'HETATM':
+                continue
+            if line[16] not in (' ', 'A'):  # First altloc only
+                continue
+
+            # Fixed columns from the PDB format spec
+            x = float(line[30:38])
+            y = float(line[38:46])
+            z = float(line[46:54])
+            coords.append((x, y, z))
+            atom_name = line[12:16].strip()
+            element = line[76:78].strip() or atom_name[:1]
+            element_codes.append(_ELEMENT_CODE.get(element, 0))
+
+            # Residue and CA tracking covers amino acids only, matching
+            # the BioPython fallback's residue filter
+            if not is_aa:
+                continue
+
+            res_name = line[17:20].strip()
+            res_id = int(line[22:26])
+            res_key = (line[21], res_id, line[26])
+            if res_key != last_res:
+                last_res = res_key
+                res_names.append(res_name)
+                res_ids.append(res_id)
+                res_codes.append(_RESIDUE_CODES.get(res_name, 0))
+
+            if atom_name == 'CA':
+                ca_coords.append((x, y, z))
+                ca_res_ids.append(res_id)
+    except (ValueError, IndexError):
+        return None
+
+    if not coords:
+        return None
+
+    return ProteinArrays(
+        coords=np.asarray(coords, dtype=np.float32),
+        element_codes=np.array(element_codes, dtype=np.int8),
+        res_names=np.array(res_names),
+        res_ids=np.array(res_ids, dtype=np.int32),
+        res_codes=np.array(res_codes, dtype=np.int8),
+        ss_codes=_assign_ss_codes(len(res_ids)),
+        ca_coords=(np.asarray(ca_coords, dtype=np.float32)
+                   if ca_coords else np.empty((0, 3), dtype=np.float32)),
+        ca_res_ids=np.array(ca_res_ids, dtype=np.int32),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _fast_arrays_cached(pdb_path):
+    """Fast-parsed arrays cache; streams lines from the gzipped file"""
+    with gzip.open(pdb_path, 'rt') as pdb_file:
+        return parse_pdb_fast(pdb_file)
+
+
+def _layout_json(title):
+    return orjson.dumps({
+        'title': {'text': title},
+        'scene': {
+            'xaxis': {'title': {'text': 'X (Å)'}},
+            'yaxis': {'title': {'text': 'Y (Å)'}},
+            'zaxis': {'title': {'text': 'Z (Å)'}}
+        },
+        'margin': {'l': 0, 'r': 0, 'b': 0, 't': 30},
+        'height': 600
+    })
+
+
+# The layouts never change per request, so serialize them once at module
+# load and splice the bytes into each figure
+_LAYOUTS = {
+    'backbone': _layout_json('Protein Backbone Structure'),
+    'surface': _layout_json('Protein Surface Representation'),
+    'atoms': _layout_json('Protein Atomic Structure'),
+    'secondary': _layout_json('Protein Secondary Structure'),
+}
+
+
+# Cap on points per figure: beyond this the JSON payload and the
+# browser's WebGL context both choke, and the extra points add no
+# visible detail
+_MAX_POINTS = 5000
+
+
+def _subsample(coords, codes, target=_MAX_POINTS):
+    """Stratified random downsample keeping each element's share of the
+    points; seeded so repeat requests produce identical plots"""
+    n = coords.shape[0]
+    if n <= target:
+        return coords, codes
+
+    rng = np.random.default_rng(0)
+    keep = []
+    for code in np.unique(codes):
+        idx = np.flatnonzero(codes == code)
+        quota = max(1, int(round(idx.size * target / n)))
+        if quota < idx.size:
+            idx = rng.choice(idx, quota, replace=False)
+        keep.append(idx)
+    keep = np.sort(np.concatenate(keep))
+
+    return coords[keep], codes[keep]
+
+
+def _every_nth(n, target=_MAX_POINTS):
+    """Stride that keeps a polyline under the point cap but continuous"""
+    return max(1, n // target)
+
+
+def _xyz(coords):
+    """Per-axis coordinate arrays for a trace, rounded to 2 decimals to
+    keep the JSON short (orjson needs them contiguous)"""
+    coords = np.round(coords.astype(np.float64), 2)
+    return {'x': np.ascontiguousarray(coords[:, 0]),
+            'y': np.ascontiguousarray(coords[:, 1]),
+            'z': np.ascontiguousarray(coords[:, 2])}
+
+
+def _figure_json(traces, mode):
+    """Serialize a figure with orjson, reusing the static layout bytes"""
+    data = orjson.dumps(traces, option=orjson.OPT_SERIALIZE_NUMPY)
+    return (b'{"data":' + data + b',"layout":' + _LAYOUTS[mode] + b'}').decode()
+
+
+# Charged residues encoded as small integer codes (0 = neutral) so the
+# charge sum becomes a single LUT gather instead of per-residue dict lookups
+_RESIDUE_CODES = {'ARG': 1, 'LYS': 2, 'HIS': 3, 'ASP': 4, 'GLU': 5}
+_CHARGE_LUT = np.array([0.0, 1.0, 1.0, 0.1, -1.0, -1.0])
+
+# Elements likewise as int8 codes (0 = other); the weight LUT gives
+# molecular weight as one gather + sum
+_ELEMENT_CODE = {'C': 1, 'N': 2, 'O': 3, 'S': 4, 'H': 5}
+_ELEMENT_WEIGHTS = np.array([0.0, 12.01, 14.01, 16.00, 32.07, 1.008])
+
+# Secondary structure codes: 0=coil, 1=helix, 2=sheet
+_SS_NAMES = np.array(['coil', 'helix', 'sheet'])
+_BACKBONE_PALETTE = np.array(['#95A5A6', '#FF6B6B', '#4ECDC4'])
+
+
+def _assign_ss_codes(residue_count):
+    """Vectorized form of the modulo heuristic: every 4th residue helix,
+    every 3rd sheet, the rest coil"""
+    idx = np.arange(1, residue_count + 1)
+    return np.where(idx % 4 == 0, 1,
+                    np.where(idx % 3 == 0, 2, 0)).astype(np.int8)
+
+
+def _arrays_from_structure(structure):
+    """Walk a BioPython structure once and build ProteinArrays; only the
+    fallback path for files the fast parser cannot handle"""
+    coords = []
+    element_codes = []
+    res_names = []
+    res_ids = []
+    res_codes = []
+    ca_coords = []
+    ca_res_ids = []
+
+    for residue in structure.get_residues():
+        if residue.id[0] == ' ':  # Only amino acid residues
+            res_name = residue.get_resname()
+            res_names.append(res_name)
+            res_ids.append(residue.get_id()[1])
+            res_codes.append(_RESIDUE_CODES.get(res_name, 0))
+        if residue.has_id('CA'):
+            ca_coords.append(residue['CA'].coord)
+            ca_res_ids.append(residue.get_id()[1])
+        for atom in residue.get_atoms():
+            coords.append(atom.coord)
+            element_codes.append(_ELEMENT_CODE.get(atom.element, 0))
+
+    return ProteinArrays(
+        coords=(np.stack(coords).astype(np.float32)
+                if coords else np.empty((0, 3), dtype=np.float32)),
+        element_codes=np.array(element_codes, dtype=np.int8),
+        res_names=np.array(res_names),
+        res_ids=np.array(res_ids, dtype=np.int32),
+        res_codes=np.array(res_codes, dtype=np.int8),
+        ss_codes=_assign_ss_codes(len(res_ids)),
+        ca_coords=(np.stack(ca_coords).astype(np.float32)
+                   if ca_coords else np.empty((0, 3), dtype=np.float32)),
+        ca_res_ids=np.array(ca_res_ids, dtype=np.int32),
+    )
+
+
 class ProteinAnalyzer:
     def __init__(self):
-        self.pdb_parser = PDB.PDBParser(QUIET=True)
-        
+        self.pdb_parser = _PARSER
+
     def fetch_pdb(self, pdb_id):
-        """Fetch PDB structure from RCSB"""
+        """Fetch the gzipped PDB structure from RCSB; returns the path of
+        the cached file"""
         try:
-            url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.text
+            return _fetch_pdb_cached(pdb_id)
         except requests.RequestException as e:
             raise Exception(f"Failed to fetch PDB structure: {e}")
-    
-    def parse_structure(self, pdb_data):
-        """Parse PDB data into BioPython structure"""
+
+    def parse_structure(self, pdb_path):
+        """Parse a gzipped PDB file into ProteinArrays; the fixed-column
+        fast parser is the primary path, BioPython only the fallback"""
+        arrays = _fast_arrays_cached(pdb_path)
+        if arrays is not None:
+            return arrays
         try:
-            # Create a temporary file-like object
-            from io import StringIO
-            pdb_file = StringIO(pdb_data)
-            structure = self.pdb_parser.get_structure("protein", pdb_file)
-            return structure
+            return _arrays_from_structure(_parse_pdb_cached(pdb_path))
         except Exception as e:
             raise Exception(f"Failed to parse PDB structure: {e}")
-    
-    def calculate_molecular_weight(self, structure):
+
+
+    def calculate_molecular_weight(self, arrays):
         """Calculate molecular weight from atomic composition"""
-        atomic_weights = {
-            'C': 12.01, 'N': 14.01, 'O': 16.00, 'S': 32.07, 'H': 1.008
-        }
-        
-        total_weight = 0
-        for atom in structure.get_atoms():
-            element = atom.element
-            if element in atomic_weights:
-                total_weight += atomic_weights[element]
-        
-        return round(total_weight, 2)
+        # One gather through the weight LUT; unknown elements (code 0)
+        # contribute nothing
+        return round(float(_ELEMENT_WEIGHTS[arrays.element_codes].sum()), 2)
     
-    def calculate_charge(self, structure):
+    def calculate_charge(self, arrays):
         """Estimate charge at pH 7.4"""
-        # Simplified charge calculation
-        charged_residues = {
-            'ARG': 1, 'LYS': 1, 'HIS': 0.1,  # Positive
-            'ASP': -1, 'GLU': -1  # Negative
-        }
-        
-        total_charge = 0
-        for residue in structure.get_residues():
-            if residue.id[0] == ' ':  # Only amino acid residues
-                res_name = residue.get_resname()
-                if res_name in charged_residues:
-                    total_charge += charged_residues[res_name]
-        
-        return round(total_charge, 1)
+        # Simplified charge calculation: gather per-residue charges
+        # through the code LUT and sum
+        return round(float(_CHARGE_LUT[arrays.res_codes].sum()), 1)
     
-    def get_residue_composition(self, structure):
+    def get_residue_composition(self, arrays):
         """Get residue type composition"""
-        residue_counts = {}
-        for residue in structure.get_residues():
-            if residue.id[0] == ' ':  # Only amino acid residues
-                res_name = residue.get_resname()
-                residue_counts[res_name] = residue_counts.get(res_name, 0) + 1
-        
-        return residue_counts
+        uniq, counts = np.unique(arrays.res_names, return_counts=True)
+
+        return dict(zip(uniq.tolist(), counts.tolist()))
     
-    def get_secondary_structure_info(self, structure):
+    def get_secondary_structure_info(self, arrays):
         """Get secondary structure information for each residue"""
         # Simplified secondary structure assignment
         # In a real implementation, you'd use DSSP or similar
-        secondary_structure = {}
-        residue_count = 0
-        
-        for residue in structure.get_residues():
-            if residue.id[0] == ' ':  # Only amino acid residues
-                residue_count += 1
-                res_id = residue.get_id()[1]
-                
-                # Simple heuristic: every 4th residue in a helix-like pattern
-                if residue_count % 4 == 0:
-                    secondary_structure[res_id] = 'helix'
-                elif residue_count % 3 == 0:
-                    secondary_structure[res_id] = 'sheet'
-                else:
-                    secondary_structure[res_id] = 'coil'
-        
-        return secondary_structure
-    
-    def create_3d_visualization(self, structure, mode='backbone'):
+        return {int(res_id): str(ss_name) for res_id, ss_name
+                in zip(arrays.res_ids, _SS_NAMES[arrays.ss_codes])}
+
+    def _ca_ss_codes(self, arrays):
+        """Secondary structure codes aligned to the CA coordinate array"""
+        if len(arrays.ca_res_ids) == len(arrays.res_ids):
+            # Every residue has a CA - the common case
+            return arrays.ss_codes
+
+        ss_by_res = dict(zip(arrays.res_ids.tolist(),
+                             arrays.ss_codes.tolist()))
+        return np.array([ss_by_res.get(int(res_id), 0)
+                         for res_id in arrays.ca_res_ids], dtype=np.int8)
+
+
+    def create_3d_visualization(self, arrays, mode='backbone'):
         """Create 3D visualization using Plotly with different modes"""
         print(f"Creating visualization with mode: {mode}")
         
         if mode == 'backbone':
-            return self.create_backbone_visualization(structure)
+            return self.create_backbone_visualization(arrays)
         elif mode == 'surface':
-            return self.create_surface_visualization(structure)
+            return self.create_surface_visualization(arrays)
         elif mode == 'atoms':
-            return self.create_atoms_visualization(structure)
+            return self.create_atoms_visualization(arrays)
         elif mode == 'secondary':
-            return self.create_secondary_structure_visualization(structure)
+            return self.create_secondary_structure_visualization(arrays)
         else:
             print(f"Unknown mode '{mode}', using backbone")
-            return self.create_backbone_visualization(structure)
+            return self.create_backbone_visualization(arrays)
     
-    def create_backbone_visualization(self, structure):
+    def create_backbone_visualization(self, arrays):
         """Create backbone-focused visualization"""
         print("Creating BACKBONE visualization")
-        # Get secondary structure information
-        secondary_structure = self.get_secondary_structure_info(structure)
-        
-        # Create backbone trace with secondary structure coloring
-        ca_coords = []
-        ca_colors = []
-        
-        for residue in structure.get_residues():
-            if residue.has_id('CA'):
-                ca_atom = residue['CA']
-                ca_coords.append(ca_atom.coord)
-                
-                # Determine secondary structure color
-                res_id = residue.get_id()[1]
-                if res_id in secondary_structure:
-                    ss_type = secondary_structure[res_id]
-                    if ss_type == 'helix':
-                        color = '#FF6B6B'  # Red for helices
-                    elif ss_type == 'sheet':
-                        color = '#4ECDC4'  # Teal for sheets
-                    else:
-                        color = '#95A5A6'  # Gray for coils
-                else:
-                    color = '#95A5A6'  # Default gray
-                
-                ca_colors.append(color)
-        
+        # Create backbone trace with secondary structure coloring: one
+        # palette gather instead of a per-residue if/elif chain
+        step = _every_nth(len(arrays.ca_coords))
+        ca_coords = arrays.ca_coords[::step]
+        ca_ss = self._ca_ss_codes(arrays)[::step]
+        ca_colors = _BACKBONE_PALETTE[ca_ss].tolist()
+
         traces = []
-        
+
         # Backbone trace
-        if ca_coords:
-            ca_x, ca_y, ca_z = zip(*ca_coords)
-            traces.append(go.Scatter3d(
-                x=ca_x, y=ca_y, z=ca_z,
-                mode='markers+lines',
-                marker=dict(
-                    size=4,
-                    color=ca_colors,
-                    opacity=0.8
-                ),
-                line=dict(
-                    color='#34495E',
-                    width=2
-                ),
-                name='Backbone'
-            ))
-        
-        # Create layout
-        layout = go.Layout(
-            title='Protein Backbone Structure',
-            scene=dict(
-                xaxis=dict(title='X (Å)'),
-                yaxis=dict(title='Y (Å)'),
-                zaxis=dict(title='Z (Å)')
-            ),
-            margin=dict(l=0, r=0, b=0, t=30),
-            height=600
-        )
-        
-        fig = go.Figure(data=traces, layout=layout)
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        if len(ca_coords):
+            traces.append({
+                'type': 'scatter3d',
+                **_xyz(ca_coords),
+                'mode': 'markers+lines',
+                'marker': {'size': 4, 'color': ca_colors, 'opacity': 0.8},
+                'line': {'color': '#34495E', 'width': 2},
+                'name': 'Backbone'
+            })
+
+        return _figure_json(traces, 'backbone')
     
-    def create_surface_visualization(self, structure):
+    def create_surface_visualization(self, arrays):
         """Create surface-focused visualization"""
         print("Creating SURFACE visualization")
         
         # Create a surface-like representation using alpha carbons only
-        ca_coords = []
-        ca_colors = []
-        
-        for residue in structure.get_residues():
-            if residue.has_id('CA'):
-                ca_atom = residue['CA']
-                ca_coords.append(ca_atom.coord)
-                ca_colors.append('#4ECDC4')  # Teal color for surface
-        
+        ca_coords = arrays.ca_coords[::_every_nth(len(arrays.ca_coords))]
+        ca_colors = ['#4ECDC4'] * len(ca_coords)  # Teal color for surface
+
         traces = []
-        
+
         # Surface representation using alpha carbons
-        if ca_coords:
-            ca_x, ca_y, ca_z = zip(*ca_coords)
-            traces.append(go.Scatter3d(
-                x=ca_x, y=ca_y, z=ca_z,
-                mode='markers',
-                marker=dict(
-                    size=8,  # Larger size for surface effect
-                    color=ca_colors,
-                    opacity=0.7,
-                    symbol='sphere'
-                ),
-                name='Surface'
-            ))
-        
-        # Create layout
-        layout = go.Layout(
-            title='Protein Surface Representation',
-            scene=dict(
-                xaxis=dict(title='X (Å)'),
-                yaxis=dict(title='Y (Å)'),
-                zaxis=dict(title='Z (Å)')
-            ),
-            margin=dict(l=0, r=0, b=0, t=30),
-            height=600
-        )
-        
-        fig = go.Figure(data=traces, layout=layout)
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        if len(ca_coords):
+            traces.append({
+                'type': 'scatter3d',
+                **_xyz(ca_coords),
+                'mode': 'markers',
+                'marker': {
+                    'size': 8,  # Larger size for surface effect
+                    'color': ca_colors,
+                    'opacity': 0.7
+                },
+                'name': 'Surface'
+            })
+
+        return _figure_json(traces, 'surface')
     
-    def create_atoms_visualization(self, structure):
+    def create_atoms_visualization(self, arrays):
         """Create detailed atomic visualization"""
         print("Creating ATOMS visualization")
         
-        # Create separate traces for different atom types
-        carbon_atoms = []
-        nitrogen_atoms = []
-        oxygen_atoms = []
-        sulfur_atoms = []
-        other_atoms = []
-        
-        for atom in structure.get_atoms():
-            coord = atom.coord
-            if atom.element == 'C':
-                carbon_atoms.append(coord)
-            elif atom.element == 'N':
-                nitrogen_atoms.append(coord)
-            elif atom.element == 'O':
-                oxygen_atoms.append(coord)
-            elif atom.element == 'S':
-                sulfur_atoms.append(coord)
-            else:
-                other_atoms.append(coord)
-        
+        # One trace per atom type, gathered with a boolean mask instead
+        # of a per-atom if/elif chain
+        coords, element_codes = _subsample(arrays.coords,
+                                           arrays.element_codes)
+
         traces = []
-        
-        # Carbon atoms (backbone and side chains)
-        if carbon_atoms:
-            c_x, c_y, c_z = zip(*carbon_atoms)
-            traces.append(go.Scatter3d(
-                x=c_x, y=c_y, z=c_z,
-                mode='markers',
-                marker=dict(size=3, color='#95A5A6', opacity=0.8),
-                name='Carbon'
-            ))
-        
-        # Nitrogen atoms
-        if nitrogen_atoms:
-            n_x, n_y, n_z = zip(*nitrogen_atoms)
-            traces.append(go.Scatter3d(
-                x=n_x, y=n_y, z=n_z,
-                mode='markers',
-                marker=dict(size=4, color='#3498DB', opacity=0.8),
-                name='Nitrogen'
-            ))
-        
-        # Oxygen atoms
-        if oxygen_atoms:
-            o_x, o_y, o_z = zip(*oxygen_atoms)
-            traces.append(go.Scatter3d(
-                x=o_x, y=o_y, z=o_z,
-                mode='markers',
-                marker=dict(size=4, color='#E74C3C', opacity=0.8),
-                name='Oxygen'
-            ))
-        
-        # Sulfur atoms
-        if sulfur_atoms:
-            s_x, s_y, s_z = zip(*sulfur_atoms)
-            traces.append(go.Scatter3d(
-                x=s_x, y=s_y, z=s_z,
-                mode='markers',
-                marker=dict(size=5, color='#F39C12', opacity=0.8),
-                name='Sulfur'
-            ))
-        
-        # Create layout
-        layout = go.Layout(
-            title='Protein Atomic Structure',
-            scene=dict(
-                xaxis=dict(title='X (Å)'),
-                yaxis=dict(title='Y (Å)'),
-                zaxis=dict(title='Z (Å)')
-            ),
-            margin=dict(l=0, r=0, b=0, t=30),
-            height=600
-        )
-        
-        fig = go.Figure(data=traces, layout=layout)
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+        for name, code, color, size in (
+                ('Carbon', _ELEMENT_CODE['C'], '#95A5A6', 3),
+                ('Nitrogen', _ELEMENT_CODE['N'], '#3498DB', 4),
+                ('Oxygen', _ELEMENT_CODE['O'], '#E74C3C', 4),
+                ('Sulfur', _ELEMENT_CODE['S'], '#F39C12', 5)):
+            atoms = coords[element_codes == code]
+            if len(atoms):
+                traces.append({
+                    'type': 'scatter3d',
+                    **_xyz(atoms),
+                    'mode': 'markers',
+                    'marker': {'size': size, 'color': color, 'opacity': 0.8},
+                    'name': name
+                })
+
+        return _figure_json(traces, 'atoms')
     
-    def create_secondary_structure_visualization(self, structure):
+    def create_secondary_structure_visualization(self, arrays):
         """Create secondary structure-focused visualization"""
         print("Creating SECONDARY STRUCTURE visualization")
         
-        # Get secondary structure information
-        secondary_structure = self.get_secondary_structure_info(structure)
-        
-        # Create traces for different secondary structure elements
-        helix_coords = []
-        sheet_coords = []
-        coil_coords = []
-        
-        for residue in structure.get_residues():
-            if residue.has_id('CA'):
-                ca_atom = residue['CA']
-                res_id = residue.get_id()[1]
-                
-                if res_id in secondary_structure:
-                    ss_type = secondary_structure[res_id]
-                    if ss_type == 'helix':
-                        helix_coords.append(ca_atom.coord)
-                    elif ss_type == 'sheet':
-                        sheet_coords.append(ca_atom.coord)
-                    else:
-                        coil_coords.append(ca_atom.coord)
-                else:
-                    coil_coords.append(ca_atom.coord)
+        # Split the CA coordinates per secondary structure element with
+        # boolean masks on the code array
+        step = _every_nth(len(arrays.ca_coords))
+        ca_coords = arrays.ca_coords[::step]
+        ca_ss = self._ca_ss_codes(arrays)[::step]
+
+        helix_coords = ca_coords[ca_ss == 1]
+        sheet_coords = ca_coords[ca_ss == 2]
+        coil_coords = ca_coords[ca_ss == 0]
         
         traces = []
         
         # Helix trace
-        if helix_coords:
-            h_x, h_y, h_z = zip(*helix_coords)
-            traces.append(go.Scatter3d(
-                x=h_x, y=h_y, z=h_z,
-                mode='markers+lines',
-                marker=dict(size=6, color='#E74C3C', opacity=0.8),
-                line=dict(color='#C0392B', width=3),
-                name='Helix'
-            ))
-        
+        if len(helix_coords):
+            traces.append({
+                'type': 'scatter3d',
+                **_xyz(helix_coords),
+                'mode': 'markers+lines',
+                'marker': {'size': 6, 'color': '#E74C3C', 'opacity': 0.8},
+                'line': {'color': '#C0392B', 'width': 3},
+                'name': 'Helix'
+            })
+
         # Sheet trace
-        if sheet_coords:
-            s_x, s_y, s_z = zip(*sheet_coords)
-            traces.append(go.Scatter3d(
-                x=s_x, y=s_y, z=s_z,
-                mode='markers+lines',
-                marker=dict(size=6, color='#3498DB', opacity=0.8),
-                line=dict(color='#2980B9', width=3),
-                name='Sheet'
-            ))
-        
+        if len(sheet_coords):
+            traces.append({
+                'type': 'scatter3d',
+                **_xyz(sheet_coords),
+                'mode': 'markers+lines',
+                'marker': {'size': 6, 'color': '#3498DB', 'opacity': 0.8},
+                'line': {'color': '#2980B9', 'width': 3},
+                'name': 'Sheet'
+            })
+
         # Coil trace
-        if coil_coords:
-            c_x, c_y, c_z = zip(*coil_coords)
-            traces.append(go.Scatter3d(
-                x=c_x, y=c_y, z=c_z,
-                mode='markers+lines',
-                marker=dict(size=4, color='#95A5A6', opacity=0.6),
-                line=dict(color='#7F8C8D', width=1),
-                name='Coil'
-            ))
-        
-        # Create layout
-        layout = go.Layout(
-            title='Protein Secondary Structure',
-            scene=dict(
-                xaxis=dict(title='X (Å)'),
-                yaxis=dict(title='Y (Å)'),
-                zaxis=dict(title='Z (Å)')
-            ),
-            margin=dict(l=0, r=0, b=0, t=30),
-            height=600
-        )
-        
-        fig = go.Figure(data=traces, layout=layout)
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        if len(coil_coords):
+            traces.append({
+                'type': 'scatter3d',
+                **_xyz(coil_coords),
+                'mode': 'markers+lines',
+                'marker': {'size': 4, 'color': '#95A5A6', 'opacity': 0.6},
+                'line': {'color': '#7F8C8D', 'width': 1},
+                'name': 'Coil'
+            })
+
+        return _figure_json(traces, 'secondary')
+
+def _analyze_pdb(pdb_id, viz_mode):
+    """Fetch, parse, and analyze a single PDB ID"""
+    # Initialize analyzer
+    analyzer = ProteinAnalyzer()
+
+    # Fetch and parse straight into ProteinArrays
+    pdb_path = analyzer.fetch_pdb(pdb_id)
+    arrays = analyzer.parse_structure(pdb_path)
+
+    # Calculate properties
+    molecular_weight = analyzer.calculate_molecular_weight(arrays)
+    charge = analyzer.calculate_charge(arrays)
+    residue_composition = analyzer.get_residue_composition(arrays)
+
+    # Counts come straight from the extracted arrays - no extra
+    # traversals of the structure
+    atom_count = int(arrays.coords.shape[0])
+    residue_count = int(arrays.res_ids.shape[0])
+
+    # Create visualization
+    plot_data = analyzer.create_3d_visualization(arrays, viz_mode)
+
+    return {
+        'protein_info': {
+            'molecular_weight': molecular_weight,
+            'charge': charge,
+            'atom_count': atom_count,
+            'residue_count': residue_count,
+            'residue_types': list(residue_composition)
+        },
+        # Already-serialized figure JSON; Fragment splices it into the
+        # response verbatim instead of re-encoding it as an escaped string
+        'plot_data': orjson.Fragment(plot_data)
+    }
+
 
 def handler(event, context):
     """Netlify serverless function handler"""
-    
+
     # Parse the request
     if event['httpMethod'] == 'POST':
         try:
             body = json.loads(event['body'])
             pdb_id = body.get('pdb_id', '').upper()
+            pdb_ids = [p.upper() for p in body.get('pdb_ids', [])]
             viz_mode = body.get('viz_mode', 'backbone')
-            
-            if not pdb_id:
+
+            if not pdb_id and not pdb_ids:
                 return {
                     'statusCode': 400,
                     'body': json.dumps({'error': 'PDB ID is required'})
                 }
-            
-            # Initialize analyzer
-            analyzer = ProteinAnalyzer()
-            
-            # Fetch and parse structure
-            pdb_data = analyzer.fetch_pdb(pdb_id)
-            structure = analyzer.parse_structure(pdb_data)
-            
-            # Calculate properties
-            molecular_weight = analyzer.calculate_molecular_weight(structure)
-            charge = analyzer.calculate_charge(structure)
-            residue_composition = analyzer.get_residue_composition(structure)
-            
-            # Count atoms and residues
-            atom_count = len(list(structure.get_atoms()))
-            residue_count = len(list(structure.get_residues()))
-            
-            # Create visualization
-            plot_data = analyzer.create_3d_visualization(structure, viz_mode)
-            
-            # Prepare response
-            response_data = {
-                'success': True,
-                'protein_info': {
-                    'molecular_weight': molecular_weight,
-                    'charge': charge,
-                    'atom_count': atom_count,
-                    'residue_count': residue_count,
-                    'residue_types': list(residue_composition.keys())
-                },
-                'plot_data': plot_data
-            }
-            
+
+            if pdb_ids:
+                # Batch request: fetch and analyze the IDs concurrently
+                futures = {p: _BATCH_EXECUTOR.submit(_analyze_pdb, p, viz_mode)
+                           for p in pdb_ids}
+                results = {}
+                for p, future in futures.items():
+                    try:
+                        results[p] = future.result()
+                    except Exception as e:
+                        results[p] = {'error': str(e)}
+                response_data = {'success': True, 'results': results}
+            else:
+                response_data = {'success': True, **_analyze_pdb(pdb_id, viz_mode)}
+
             return {
                 'statusCode': 200,
                 'headers': {
@@ -441,7 +577,7 @@ def handler(event, context):
                     'Access-Control-Allow-Headers': 'Content-Type',
                     'Access-Control-Allow-Methods': 'POST, OPTIONS'
                 },
-                'body': json.dumps(response_data)
+                'body': orjson.dumps(response_data).decode()
             }
             
         except Exception as e:
@@ -252,6 +252,9 @@ class ProteinVisualizer {
                 // Update only the visualization, not the entire results
                 this.currentPlotData = data.plot_data;
                 this.create3DVisualization(data.plot_data, mode);
+            } else if (data.plot_job) {
+                // Backend is rendering the plot in the background
+                this.pollPlotJob(data.plot_job, mode);
             } else {
                 console.error('Error switching visualization mode:', data.error);
             }
@@ -283,6 +286,11 @@ class ProteinVisualizer {
             console.log('Received plot_data:', plot_data);
             this.currentPlotData = plot_data;
             this.create3DVisualization(plot_data, 'backbone'); // Default to backbone mode
+        } else if (data.plot_job) {
+            // Backend returned metadata immediately and is rendering the
+            // plot in the background - poll until it is ready
+            this.showPlotLoading();
+            this.pollPlotJob(data.plot_job, 'backbone');
         } else {
             console.error('No plot_data received from API');
             this.plotContainer.innerHTML = `
@@ -306,6 +314,44 @@ class ProteinVisualizer {
         }, 100);
     }
 
+    showPlotLoading() {
+        this.plotContainer.innerHTML = `
+            <div class="plot-placeholder">
+                <div class="placeholder-icon">⏳</div>
+                <p>Rendering 3D visualization...</p>
+            </div>
+        `;
+    }
+
+    async pollPlotJob(jobId, mode, attempt = 0) {
+        // Give up after ~30s of polling
+        if (attempt > 60) {
+            console.error('Plot job timed out:', jobId);
+            return;
+        }
+
+        try {
+            const response = await fetch(`${this.backendUrl}/plot/${jobId}`);
+
+            if (response.status === 202) {
+                setTimeout(() => this.pollPlotJob(jobId, mode, attempt + 1), 500);
+                return;
+            }
+
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+
+            const data = await response.json();
+            if (data.plot_data) {
+                this.currentPlotData = data.plot_data;
+                this.create3DVisualization(data.plot_data, mode);
+            }
+        } catch (error) {
+            console.error('Error polling plot job:', error);
+        }
+    }
+
     animateValue(element, targetValue) {
         const startValue = 0;
         const duration = 1000;
@@ -58,7 +58,19 @@ def test_app():
             print(f"   Atoms: {data['protein_info']['atom_count']}")
             print(f"   Residues: {data['protein_info']['residue_count']}")
             print(f"   Charge: {data['protein_info']['charge']}")
-            print(f"   3D Plot: {'✅' if data['plot_data'] else '❌'}")
+
+            # The plot renders in the background; poll until it is ready
+            plot_data = data.get('plot_data')
+            if not plot_data and data.get('plot_job'):
+                for _ in range(60):
+                    plot_response = requests.get(f"{base_url}/plot/{data['plot_job']}")
+                    if plot_response.status_code == 200:
+                        plot_data = plot_response.json().get('plot_data')
+                        break
+                    if plot_response.status_code != 202:
+                        break
+                    time.sleep(0.5)
+            print(f"   3D Plot: {'✅' if plot_data else '❌'}")
         else:
             print(f"❌ Protein analysis failed: {response.status_code}")
             print(f"   Response: {response.text}")